@@ -14,43 +14,91 @@ import argparse
 import json
 import mimetypes
 import os
-import re
 import shutil
 import struct
 import threading
-from dataclasses import dataclass
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from email.utils import formatdate
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 from urllib.parse import parse_qs, urlparse
 
 
 IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
-_DUP_SUFFIX_RE = re.compile(r"^(.*?)( \([0-9]+\))$", re.IGNORECASE)
-
-
-def get_image_dimensions(path: Path) -> tuple[int, int] | None:
+# Precompiled header layouts for get_image_dimensions (avoids re-parsing the
+# format string on every call).
+_U_BE_II = struct.Struct('>II')
+_U_BE_H = struct.Struct('>H')
+_U_BE_HH = struct.Struct('>HH')
+_U_LE_HH = struct.Struct('<HH')
+_U_LE_ii = struct.Struct('<ii')
+# Single integers are read with int.from_bytes; TIFF byte order marker -> byteorder.
+_TIFF_BYTEORDER = {b'II': 'little', b'MM': 'big'}
+# TIFF IFD entry: tag, type, count, value/offset.
+_TIFF_IFD_ENTRY = {b'II': struct.Struct('<HHII'), b'MM': struct.Struct('>HHII')}
+# Indexing is dominated by stat/open/read syscalls (which release the GIL), so a
+# generous thread count lets disk latency overlap across files.
+_INDEX_WORKERS = 32
+
+
+def get_image_dimensions(path: str | Path) -> tuple[int, int] | None:
     """Extract image dimensions without external dependencies.
 
     Returns (width, height) or None if unable to determine.
     """
     try:
-        with path.open("rb") as f:
-            head = f.read(24)
+        with open(path, "rb") as f:
+            # 26 bytes covers the BMP width/height fields at offset 18.
+            head = f.read(26)
             if len(head) < 24:
                 return None
 
             # PNG
             if head[:8] == b'\x89PNG\r\n\x1a\n':
                 f.seek(16)
-                w, h = struct.unpack('>II', f.read(8))
+                w, h = _U_BE_II.unpack(f.read(8))
                 return (w, h)
 
             # JPEG
             if head[:2] == b'\xff\xd8':
+                # Scan markers in one buffered read; the SOF segment is almost
+                # always within the first 64KB.
                 f.seek(0)
-                size = 2
+                buf = f.read(65536)
+                n = len(buf)
+                i = 2
+                while True:
+                    pos = i
+                    i = buf.find(b'\xff', i)
+                    if i < 0:
+                        pos = max(pos, n)
+                        break
+                    while i < n and buf[i] == 0xff:
+                        i += 1
+                    if i + 3 > n:
+                        break
+                    ftype = buf[i]
+                    seg_len = _U_BE_H.unpack_from(buf, i + 1)[0]
+                    if 0xc0 <= ftype <= 0xcf and ftype not in (0xc4, 0xc8, 0xcc):
+                        if seg_len - 2 < 5:
+                            return None
+                        if i + 8 > n:
+                            break
+                        h, w = _U_BE_HH.unpack_from(buf, i + 4)
+                        return (w, h)
+                    i += 1 + seg_len
+
+                # SOF not in the buffer (e.g. a large embedded thumbnail):
+                # fall back to streaming from where the buffered scan stopped.
+                f.seek(pos)
+                size = 0
                 ftype = 0
                 while not 0xc0 <= ftype <= 0xcf or ftype in (0xc4, 0xc8, 0xcc):
                     f.seek(size, 1)
@@ -68,21 +116,21 @@ def get_image_dimensions(path: Path) -> tuple[int, int] | None:
                     size_bytes = f.read(2)
                     if len(size_bytes) < 2:
                         return None
-                    size = struct.unpack('>H', size_bytes)[0] - 2
+                    size = _U_BE_H.unpack_from(size_bytes, 0)[0] - 2
                 if size < 5:
                     return None
                 f.read(1)  # precision
-                h, w = struct.unpack('>HH', f.read(4))
+                h, w = _U_BE_HH.unpack(f.read(4))
                 return (w, h)
 
             # GIF
             if head[:6] in (b'GIF87a', b'GIF89a'):
-                w, h = struct.unpack('<HH', head[6:10])
+                w, h = _U_LE_HH.unpack_from(head, 6)
                 return (w, h)
 
             # BMP
             if head[:2] == b'BM':
-                w, h = struct.unpack('<ii', head[18:26])
+                w, h = _U_LE_ii.unpack_from(head, 18)
                 return (abs(w), abs(h))
 
             # WEBP
@@ -90,37 +138,39 @@ def get_image_dimensions(path: Path) -> tuple[int, int] | None:
                 if head[12:16] == b'VP8 ':
                     f.seek(26)
                     data = f.read(4)
-                    w = struct.unpack('<H', data[0:2])[0] & 0x3fff
-                    h = struct.unpack('<H', data[2:4])[0] & 0x3fff
-                    return (w, h)
+                    w, h = _U_LE_HH.unpack(data)
+                    return (w & 0x3fff, h & 0x3fff)
                 elif head[12:16] == b'VP8L':
                     f.seek(21)
                     data = f.read(4)
-                    bits = struct.unpack('<I', data)[0]
+                    if len(data) < 4:
+                        return None
+                    bits = int.from_bytes(data, 'little')
                     w = (bits & 0x3fff) + 1
                     h = ((bits >> 14) & 0x3fff) + 1
                     return (w, h)
                 elif head[12:16] == b'VP8X':
                     f.seek(24)
                     data = f.read(6)
-                    w = struct.unpack('<I', data[0:3] + b'\x00')[0] + 1
-                    h = struct.unpack('<I', data[3:6] + b'\x00')[0] + 1
+                    if len(data) < 6:
+                        return None
+                    w = int.from_bytes(data[0:3], 'little') + 1
+                    h = int.from_bytes(data[3:6], 'little') + 1
                     return (w, h)
 
             # TIFF
             if head[:2] in (b'II', b'MM'):
-                endian = '<' if head[:2] == b'II' else '>'
-                f.seek(4)
-                offset = struct.unpack(endian + 'I', f.read(4))[0]
+                byteorder = _TIFF_BYTEORDER[head[:2]]
+                offset = int.from_bytes(head[4:8], byteorder)
                 f.seek(offset)
-                num_tags = struct.unpack(endian + 'H', f.read(2))[0]
+                num_tags = int.from_bytes(f.read(2), byteorder)
+                # Read the whole IFD at once and unpack every entry in one sweep.
+                entries = memoryview(f.read(num_tags * 12))
+                entries = entries[:len(entries) - len(entries) % 12]
                 w = h = None
-                for _ in range(num_tags):
-                    tag_data = f.read(12)
-                    if len(tag_data) < 12:
-                        break
-                    tag = struct.unpack(endian + 'H', tag_data[:2])[0]
-                    value = struct.unpack(endian + 'I', tag_data[8:12])[0]
+                for tag, typ, _count, value in _TIFF_IFD_ENTRY[head[:2]].iter_unpack(entries):
+                    if typ == 3:  # SHORT values are left-justified in the field
+                        value = value >> 16 if byteorder == 'big' else value & 0xffff
                     if tag == 256:  # ImageWidth
                         w = value
                     elif tag == 257:  # ImageLength
@@ -132,12 +182,20 @@ def get_image_dimensions(path: Path) -> tuple[int, int] | None:
     return None
 
 
-def normalize_key(p: Path) -> str:
-    stem = p.stem
-    m = _DUP_SUFFIX_RE.match(stem)
-    if m:
-        stem = m.group(1)
-    return stem.lower()
+def strip_dup_suffix(stem: str) -> str:
+    """Remove a trailing copy suffix like " (2)" from a filename stem."""
+    if stem.endswith(")"):
+        i = stem.rfind(" (")
+        if i >= 0:
+            n = stem[i + 2:-1]
+            if n.isdigit() and n.isascii():
+                return stem[:i]
+    return stem
+
+
+def normalize_key(name: str) -> str:
+    """Grouping key for a file name: the stem, lowercased, without a copy suffix."""
+    return strip_dup_suffix(name.rpartition(".")[0]).lower()
 
 
 def folder_rel_key(root: Path, p: Path) -> str:
@@ -155,11 +213,35 @@ def folder_rel_key(root: Path, p: Path) -> str:
     return rel_s or "."
 
 
+def filter_aspect_matches(
+    ids: list[int], widths: array, heights: array, base: int, tol: float = 0.001
+) -> list[int]:
+    """Ids (other than base) whose aspect ratio is within tol of base's.
+
+    If base's aspect ratio is unknown every other id matches; otherwise ids
+    with unknown dimensions (<= 0) are dropped.
+    """
+    bw, bh = widths[base], heights[base]
+    if bw <= 0 or bh <= 0:
+        return [fid for fid in ids if fid != base]
+    base_aspect = bw / bh
+    limit = tol * base_aspect
+    out = []
+    for fid in ids:
+        h = heights[fid]
+        if fid == base or h <= 0:
+            continue
+        w = widths[fid]
+        if w > 0 and abs(w / h - base_aspect) <= limit:
+            out.append(fid)
+    return out
+
+
 def iso_mtime(ts: float) -> str:
     return datetime.fromtimestamp(ts).isoformat(timespec="seconds")
 
 
-@dataclass
+@dataclass(slots=True)
 class FileInfo:
     id: int
     relpath: str
@@ -175,11 +257,22 @@ class DuplicateState:
         self.root = root
         self.permanent_delete = permanent_delete
         self.trash_dir = root / ".image-dup-trash"
+        # Sidecar cache of image dimensions, keyed by relpath and validated by
+        # (mtime, size), so unchanged files skip the header parse on restart.
+        self.cache_path = root / ".image-dup-cache.json"
         self.subfolder = subfolder
 
         self._lock = threading.Lock()
         self._paths: dict[int, Path] = {}
-        self._info: dict[int, FileInfo] = {}
+        # File metadata is stored column-wise, indexed by id (-1 = unknown
+        # dimension); FileInfo objects are only built when served.
+        self._relpaths: list[str] = []
+        self._sizes = array("q")
+        self._mtimes = array("d")
+        self._widths = array("q")
+        self._heights = array("q")
+        # Lazily built, serialized FileInfo dicts, reused across responses.
+        self._info: dict[int, dict] = {}
         # Candidate pairs: (left_id, right_id, group_key). These are stable indices
         # for cursor-based paging.
         self._pairs: list[tuple[int, int, str]] = []
@@ -187,6 +280,7 @@ class DuplicateState:
         # Backwards-compat single-pair navigation (kept, but not used by the new UI).
         # group_key is a string that includes the folder + normalized key.
         self._groups: list[tuple[str, list[int]]] = []  # (group_key, ids)
+        self._id_to_group: dict[int, int] = {}  # id -> index into _groups
         self._group_idx = 0
 
     def list_subfolders(self) -> list[str]:
@@ -200,104 +294,216 @@ class DuplicateState:
             pass
         return subfolders
 
+    def _load_cache(self) -> dict[str, list]:
+        """Load the dimension cache: {relpath: [mtime, size, width, height]}."""
+        try:
+            with self.cache_path.open("r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _save_cache(self, cache: dict[str, list]) -> None:
+        # Write to a temp file and rename so a crash never leaves a torn cache.
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(cache, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            # The cache is only an optimization (e.g. root may be read-only).
+            tmp.unlink(missing_ok=True)
+
+    def _scan(self, directory: str) -> Iterator[tuple[str, str, os.stat_result]]:
+        """Yield (path, name, stat) for every image under directory.
+
+        Uses os.scandir so the file type (and on some platforms the stat data)
+        comes straight from the directory listing instead of extra syscalls.
+        Symlinks are not followed, so linked files and directories are skipped.
+        """
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            return
+        with it:
+            for entry in it:
+                # Prune hidden files/dirs + our trash folder.
+                if entry.name.startswith(".") or entry.name == ".image-dup-trash":
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._scan(entry.path)
+                    # Check the name before the type; with follow_symlinks=False
+                    # both type and stat come from the directory entry (d_type /
+                    # FindFirstFile data) where the platform provides it.
+                    elif (
+                        os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS
+                        and entry.is_file(follow_symlinks=False)
+                    ):
+                        yield entry.path, entry.name, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
     def build_index(self) -> None:
-        # os.walk is significantly faster than Path.rglob for large trees.
         # If subfolder is specified, only index that subfolder
         scan_root = self.root / self.subfolder if self.subfolder else self.root
 
-        paths: list[Path] = []
-        for dirpath, dirnames, filenames in os.walk(scan_root):
-            # Prune hidden dirs + our trash folder.
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if not d.startswith(".") and d != ".image-dup-trash"
-            ]
-            for fn in filenames:
-                if fn.startswith("."):
-                    continue
-                p = Path(dirpath) / fn
-                if p.suffix.lower() in IMAGE_EXTS:
-                    paths.append(p)
-
-        paths.sort(key=lambda p: p.name.lower())
-        paths_by_id = {i: p for i, p in enumerate(paths)}
-
-        info_by_id: dict[int, FileInfo] = {}
-        for i, p in paths_by_id.items():
-            st = p.stat()
-            dims = get_image_dimensions(p)
-            width, height = dims if dims else (None, None)
-            info_by_id[i] = FileInfo(
-                id=i,
-                relpath=str(p.relative_to(self.root)),
-                name=p.name,
-                size_bytes=st.st_size,
-                mtime_iso=iso_mtime(st.st_mtime),
-                width=width,
-                height=height,
-            )
+        # The indexing hot path works on plain strings; a Path is only created
+        # once per file for the final id -> path map.
+        entries = sorted(self._scan(str(scan_root)), key=lambda e: e[1].lower())
+
+        n = len(entries)
+        relpaths = [""] * n
+        sizes = array("q", (st.st_size for _, _, st in entries))
+        mtimes = array("d", (st.st_mtime for _, _, st in entries))
+        widths = array("q", [-1]) * n
+        heights = array("q", [-1]) * n
+
+        # Files in the same directory share a folder key and relative-path
+        # prefix; compute them once per directory rather than once per file.
+        folder_keys: dict[str, tuple[str, str]] = {}
 
         # IMPORTANT: only compare duplicates within the same directory.
-        # Key = (relative_folder, normalized_filename_key)
-        groups: dict[tuple[str, str], list[int]] = {}
-        for i, p in paths_by_id.items():
-            groups.setdefault((folder_rel_key(self.root, p), normalize_key(p)), []).append(i)
+        # Sort once by (relative_folder, normalized_filename_key, name) so every
+        # group is a contiguous, name-ordered run.
+        keyed: list[tuple[str, str, str, int]] = []
+        for i, (full, name, _) in enumerate(entries):
+            dirpath = full[: len(full) - len(name) - 1]
+            cached = folder_keys.get(dirpath)
+            if cached is None:
+                rel_dir = os.path.relpath(dirpath, self.root)
+                rel_prefix = "" if rel_dir == "." else rel_dir + os.sep
+                cached = folder_keys[dirpath] = (folder_rel_key(self.root, Path(full)), rel_prefix)
+            folder_key, rel_prefix = cached
+            relpaths[i] = rel_prefix + name
+            keyed.append((folder_key, normalize_key(name), name.lower(), i))
+        keyed.sort()
+
+        groups: list[tuple[str, str, list[tuple[str, str, str, int]]]] = []
+        for (folder_key, name_key), run in groupby(keyed, key=itemgetter(0, 1)):
+            run = list(run)
+            if len(run) >= 2:
+                groups.append((folder_key, name_key, run))
+
+        # Dimensions only matter for the aspect-ratio filter, so files that are
+        # alone in their group are never opened.
+        cache = self._load_cache()
+
+        def probe(i: int) -> tuple[int, tuple[int, int] | None]:
+            st = entries[i][2]
+            hit = cache.get(relpaths[i])
+            # The sidecar may be stale or hand-edited; anything malformed is
+            # treated as a miss rather than trusted.
+            if isinstance(hit, list) and len(hit) == 4 and hit[0] == st.st_mtime and hit[1] == st.st_size:
+                w, h = hit[2], hit[3]
+                if w is None and h is None:
+                    return i, None
+                if type(w) is int and type(h) is int and w >= 0 and h >= 0:
+                    return i, (w, h)
+            return i, get_image_dimensions(entries[i][0])
+
+        fresh: dict[str, list] = {}
+        with ThreadPoolExecutor(max_workers=_INDEX_WORKERS) as pool:
+            futures = [pool.submit(probe, t[3]) for _, _, run in groups for t in run]
+            for fut in futures:
+                i, dims = fut.result()
+                if dims:
+                    widths[i], heights[i] = dims
+                fresh[relpaths[i]] = [mtimes[i], sizes[i], *(dims or (None, None))]
+
+        # Entries for files that still exist stay valid (they are re-checked
+        # against mtime/size on use); entries for removed files are dropped.
+        new_cache = {rp: cache[rp] for rp in relpaths if rp in cache}
+        new_cache.update(fresh)
+        if self.subfolder:
+            # Keep entries for the rest of the tree.
+            prefix = str(Path(self.subfolder)) + os.sep
+            new_cache.update((k, v) for k, v in cache.items() if not k.startswith(prefix))
+        self._save_cache(new_cache)
 
         grouped: list[tuple[str, list[int]]] = []
-        pairs: list[tuple[int, int, str]] = []
-        for (folder_key, name_key), ids in groups.items():
-            if len(ids) < 2:
-                continue
-            ids.sort(key=lambda fid: paths_by_id[fid].name.lower())
+        # (group_key, left_name_lower, right_name_lower, left_id, right_id): the
+        # sort key is built once here instead of on every comparison.
+        keyed_pairs: list[tuple[str, str, str, int, int]] = []
+        for folder_key, name_key, run in groups:
+            ids = [t[3] for t in run]
             group_key = name_key if folder_key == "." else f"{folder_key} / {name_key}"
             grouped.append((group_key, ids.copy()))
 
             # Pairing strategy: choose a "base" (prefer the non-suffixed filename)
-            # then pair base vs every other candidate in the group.
-            base = ids[0]
-            for fid in ids:
-                stem = paths_by_id[fid].stem
-                if stem.lower() == name_key and _DUP_SUFFIX_RE.match(stem) is None:
-                    base = fid
+            # then pair base vs every other candidate in the group. A stem that
+            # lowercases to the group key cannot carry a " (N)" suffix.
+            base, base_name = ids[0], run[0][2]
+            for _, _, name, fid in run:
+                if name.rpartition(".")[0] == name_key:
+                    base, base_name = fid, name
                     break
 
-            # Get base aspect ratio for filtering
-            base_info = info_by_id[base]
-            base_aspect = None
-            if base_info.width and base_info.height and base_info.height > 0:
-                base_aspect = base_info.width / base_info.height
-
-            for other in ids:
-                if other == base:
-                    continue
-
-                # Only pair if aspect ratios match (within small tolerance for rounding)
-                if base_aspect is not None:
-                    other_info = info_by_id[other]
-                    if other_info.width and other_info.height and other_info.height > 0:
-                        other_aspect = other_info.width / other_info.height
-                        # Allow 0.1% tolerance for rounding errors
-                        if abs(base_aspect - other_aspect) / base_aspect > 0.001:
-                            continue
-                    else:
-                        # Skip if we can't determine aspect ratio
-                        continue
-
-                pairs.append((base, other, group_key))
+            names = {fid: name for _, _, name, fid in run}
+            for other in filter_aspect_matches(ids, widths, heights, base):
+                keyed_pairs.append((group_key, base_name, names[other], base, other))
 
         grouped.sort(key=lambda kv: kv[0])
-        pairs.sort(key=lambda t: (t[2], paths_by_id[t[0]].name.lower(), paths_by_id[t[1]].name.lower()))
+        id_to_group = {fid: gi for gi, (_, ids) in enumerate(grouped) for fid in ids}
+        keyed_pairs.sort()
+        pairs = [(left, right, key) for key, _, _, left, right in keyed_pairs]
 
+        paths_by_id = {i: Path(full) for i, (full, _, _) in enumerate(entries)}
         with self._lock:
             self._paths = paths_by_id
-            self._info = info_by_id
+            self._relpaths = relpaths
+            self._sizes = sizes
+            self._mtimes = mtimes
+            self._widths = widths
+            self._heights = heights
+            self._info = {}
             self._pairs = pairs
             self._groups = grouped
+            self._id_to_group = id_to_group
             self._group_idx = 0
 
-    def _file_info_unlocked(self, fid: int) -> FileInfo:
-        return self._info[fid]
+    def _file_info_unlocked(self, fid: int) -> dict:
+        info = self._info.get(fid)
+        if info is None:
+            w, h = self._widths[fid], self._heights[fid]
+            info = asdict(FileInfo(
+                id=fid,
+                relpath=self._relpaths[fid],
+                name=self._paths[fid].name,
+                size_bytes=self._sizes[fid],
+                mtime_iso=iso_mtime(self._mtimes[fid]),
+                width=w if w >= 0 else None,
+                height=h if h >= 0 else None,
+            ))
+            self._info[fid] = info
+        return info
+
+    def _next_pair_unlocked(self, i: int) -> tuple[int, dict | None]:
+        """Find the first valid pair at or after index i.
+
+        Returns (next_index, record), with record None once the list is exhausted.
+        Deleted/missing files are skipped.
+        """
+        while i < len(self._pairs):
+            left_id, right_id, key = self._pairs[i]
+            pair_id = i
+            i += 1
+            if left_id not in self._paths or right_id not in self._paths:
+                continue
+            return i, {
+                "pair_id": pair_id,
+                "group_key": key,
+                "left": self._file_info_unlocked(left_id),
+                "right": self._file_info_unlocked(right_id),
+            }
+        return i, None
+
+    def _page_trailer_unlocked(self, i: int) -> dict:
+        return {
+            "next_cursor": i,
+            "done": i >= len(self._pairs),
+            "total_candidate_pairs": len(self._pairs),
+        }
 
     def pairs_page(self, *, cursor: int, limit: int) -> dict:
         """Return a page of valid pairs using a stable cursor.
@@ -311,28 +517,30 @@ class DuplicateState:
         out = []
         with self._lock:
             i = cursor
-            while i < len(self._pairs) and len(out) < limit:
-                left_id, right_id, key = self._pairs[i]
-                pair_id = i
-                i += 1
-                if left_id not in self._paths or right_id not in self._paths:
-                    continue
-                out.append(
-                    {
-                        "pair_id": pair_id,
-                        "group_key": key,
-                        "left": self._file_info_unlocked(left_id).__dict__,
-                        "right": self._file_info_unlocked(right_id).__dict__,
-                    }
-                )
-
-            done = i >= len(self._pairs)
-            return {
-                "pairs": out,
-                "next_cursor": i,
-                "done": done,
-                "total_candidate_pairs": len(self._pairs),
-            }
+            while len(out) < limit:
+                i, rec = self._next_pair_unlocked(i)
+                if rec is None:
+                    break
+                out.append(rec)
+            return {"pairs": out, **self._page_trailer_unlocked(i)}
+
+    def iter_pairs(self, *, cursor: int, limit: int) -> Iterator[dict]:
+        """Yield the pairs_page records one at a time, then its paging trailer.
+
+        The lock is only held per record, so a slow reader of the stream never
+        blocks deletes.
+        """
+        limit = max(1, min(int(limit), 200))
+        i = max(0, int(cursor))
+        for _ in range(limit):
+            with self._lock:
+                i, rec = self._next_pair_unlocked(i)
+            if rec is None:
+                break
+            yield rec
+        with self._lock:
+            trailer = self._page_trailer_unlocked(i)
+        yield trailer
 
     def _advance_to_valid_group_unlocked(self) -> None:
         while self._group_idx < len(self._groups) and len(self._groups[self._group_idx][1]) < 2:
@@ -351,8 +559,8 @@ class DuplicateState:
                 "group_key": key,
                 "group_index": self._group_idx + 1,
                 "group_count": len(self._groups),
-                "left": self._file_info_unlocked(left).__dict__,
-                "right": self._file_info_unlocked(right).__dict__,
+                "left": self._file_info_unlocked(left),
+                "right": self._file_info_unlocked(right),
             }
 
     def skip_group(self) -> dict:
@@ -366,11 +574,10 @@ class DuplicateState:
                 raise FileNotFoundError(f"Unknown id {fid}")
             p = self._paths[fid]
 
-            # Remove from all groups that contain it (normally exactly one).
-            for idx, (key, ids) in enumerate(self._groups):
-                if fid in ids:
-                    ids.remove(fid)
-                    self._groups[idx] = (key, ids)
+            # Remove from its group (each id belongs to at most one).
+            gi = self._id_to_group.pop(fid, None)
+            if gi is not None:
+                self._groups[gi][1].remove(fid)
 
             # Perform filesystem action.
             if self.permanent_delete:
@@ -417,6 +624,19 @@ def _read_json_body(handler: SimpleHTTPRequestHandler) -> dict:
         raise ValueError(f"Invalid JSON body: {e}")
 
 
+def _send_ndjson(handler: SimpleHTTPRequestHandler, records: Iterable[dict]) -> None:
+    """Stream records as newline-delimited JSON, writing each as it is produced."""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+    # The server speaks HTTP/1.0, which has no chunked encoding: the body is
+    # delimited by closing the connection.
+    handler.send_header("Connection", "close")
+    handler.end_headers()
+    handler.close_connection = True
+    for rec in records:
+        handler.wfile.write(json.dumps(rec).encode("utf-8") + b"\n")
+
+
 def _send_json(handler: SimpleHTTPRequestHandler, payload: dict, status: int = 200) -> None:
     data = json.dumps(payload).encode("utf-8")
     handler.send_response(status)
@@ -426,6 +646,34 @@ def _send_json(handler: SimpleHTTPRequestHandler, payload: dict, status: int = 2
     handler.wfile.write(data)
 
 
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single "bytes=a-b" Range header into an inclusive (start, end).
+
+    Returns None when the header is absent, malformed or asks for multiple
+    ranges (the full body is sent instead). A start past EOF is returned as-is
+    so the caller can reply 416.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[6:].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes.
+            n = int(last)
+            if n <= 0:
+                return None
+            return (max(0, size - n), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    return (start, min(end, size - 1))
+
+
 class Handler(SimpleHTTPRequestHandler):
     # Will be injected.
     state: DuplicateState
@@ -442,29 +690,86 @@ class Handler(SimpleHTTPRequestHandler):
             limit = int((qs.get("limit") or ["24"])[0])
             return _send_json(self, self.state.pairs_page(cursor=cursor, limit=limit))
 
+        if parsed.path == "/api/pairs_ndjson":
+            qs = parse_qs(parsed.query or "")
+            cursor = int((qs.get("cursor") or ["0"])[0])
+            limit = int((qs.get("limit") or ["24"])[0])
+            return _send_ndjson(self, self.state.iter_pairs(cursor=cursor, limit=limit))
+
         if parsed.path == "/api/subfolders":
             return _send_json(self, {"subfolders": self.state.list_subfolders(), "current": self.state.subfolder})
 
         if parsed.path.startswith("/img/"):
+            # Resolve and open before any headers go out so failures can still
+            # be reported as a clean 404.
             try:
                 fid = int(parsed.path.split("/", 2)[2])
-                p = self.state.open_path_for_id(fid)
-                ctype, _ = mimetypes.guess_type(p.name)
-                ctype = ctype or "application/octet-stream"
-                st = p.stat()
-                self.send_response(HTTPStatus.OK)
-                self.send_header("Content-Type", ctype)
-                self.send_header("Content-Length", str(st.st_size))
-                self.end_headers()
-                with p.open("rb") as f:
-                    shutil.copyfileobj(f, self.wfile)
+                f = self.state.open_path_for_id(fid).open("rb")
             except Exception as e:
                 return _send_json(self, {"error": str(e)}, status=404)
-            return
+            with f:
+                return self._send_image(f, fid)
 
         # Static UI
         return super().do_GET()
 
+    def _send_image(self, f: BinaryIO, fid: int) -> None:
+        """Send an open image with validators, honoring conditional and Range requests."""
+        ctype, _ = mimetypes.guess_type(f.name)
+        ctype = ctype or "application/octet-stream"
+        st = os.fstat(f.fileno())
+        # ids are reassigned on every re-index, so the validator includes the
+        # inode and we always revalidate rather than trusting a max-age.
+        etag = f'"{fid}-{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+
+        # If-Modified-Since is deliberately ignored: an mtime alone can't tell a
+        # re-indexed id's new file from the old one, and browsers holding an
+        # ETag always send If-None-Match.
+        inm = self.headers.get("If-None-Match")
+        if inm is not None and (etag in (t.strip() for t in inm.split(",")) or inm.strip() == "*"):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "private, no-cache")
+            self.end_headers()
+            return
+
+        start, length = 0, st.st_size
+        status = HTTPStatus.OK
+        rng = _parse_range(self.headers.get("Range"), st.st_size)
+        if rng is not None:
+            if rng[0] >= st.st_size:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = rng
+            length = end - start + 1
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", "private, no-cache")
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{start + length - 1}/{st.st_size}")
+        self.end_headers()
+        if not length:
+            return
+        # Headers go through wfile; the body bypasses it via sendfile(2)
+        # (socket.sendfile falls back to send()).
+        self.wfile.flush()
+        try:
+            self.connection.sendfile(f, start, length)
+        except OSError:
+            # Headers are already sent, so an error reply would corrupt the
+            # stream; drop the connection instead.
+            self.close_connection = True
+
     def do_POST(self) -> None:  # noqa: N802
         parsed = urlparse(self.path)
         try:
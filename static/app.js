@@ -42,9 +42,30 @@ async function apiDelete(id) {
   return await r.json();
 }
 
-async function apiPairs(nextCursor, limit = 24) {
-  const r = await fetch(`/api/pairs?cursor=${encodeURIComponent(nextCursor)}&limit=${encodeURIComponent(limit)}`);
-  return await r.json();
+// Streams pairs as NDJSON, calling onPair for each one as it arrives.
+// Resolves with the final paging record ({next_cursor, done, total_candidate_pairs}).
+async function apiPairsStream(nextCursor, limit, onPair) {
+  const r = await fetch(`/api/pairs_ndjson?cursor=${encodeURIComponent(nextCursor)}&limit=${encodeURIComponent(limit)}`);
+  if (!r.ok) return await r.json();
+  const reader = r.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = '';
+  let trailer = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    buf += decoder.decode(value, { stream: !done });
+    let nl;
+    while ((nl = buf.indexOf('\n')) >= 0) {
+      const line = buf.slice(0, nl);
+      buf = buf.slice(nl + 1);
+      if (!line) continue;
+      const rec = JSON.parse(line);
+      if ('pair_id' in rec) onPair(rec);
+      else trailer = rec;
+    }
+    if (done) break;
+  }
+  return trailer || { error: 'Incomplete pairs response' };
 }
 
 async function apiSubfolders() {
@@ -182,7 +203,7 @@ async function loadMore() {
   if (loading || done) return;
   loading = true;
   updateStatus();
-  const data = await apiPairs(cursor, 24);
+  const data = await apiPairsStream(cursor, 24, appendPair);
   if (data.error) {
     loading = false;
     alert(data.error);
@@ -191,7 +212,6 @@ async function loadMore() {
   totalCandidatePairs = data.total_candidate_pairs;
   cursor = data.next_cursor;
   done = data.done;
-  (data.pairs || []).forEach(appendPair);
   loading = false;
   setDone(done);
   updateStatus();
@@ -1,9 +1,30 @@
+import http.client
+import json
+import os
+import socket
+import struct
 import tempfile
+import threading
 import unittest
+from array import array
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 
 
-from app import DuplicateState
+from app import (
+    DuplicateState,
+    Handler,
+    _parse_range,
+    filter_aspect_matches,
+    get_image_dimensions,
+    normalize_key,
+)
+
+
+def _jpeg(width: int, height: int, app_segments: int = 1) -> bytes:
+    app1 = b"\xff\xe1" + struct.pack(">H", 40002) + b"\x00" * 40000
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app1 * app_segments + sof0 + b"\xff\xd9"
 
 
 class DuplicateStateTests(unittest.TestCase):
@@ -56,6 +77,78 @@ class DuplicateStateTests(unittest.TestCase):
             page2 = st.pairs_page(cursor=0, limit=10)
             self.assertEqual(page2["pairs"], [])
             self.assertTrue(page2["done"])
+            # The group shrank below two members, so single-pair navigation is done too.
+            self.assertTrue(st.current_pair()["done"])
+
+    def test_malformed_cache_entries_are_ignored(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            self._write(root / "A.jpg")
+            self._write(root / "A (2).jpg")
+            self._write(root / "B.jpg")
+            self._write(root / "B (2).jpg")
+            self._write(root / "C.jpg")
+            self._write(root / "C (2).jpg")
+
+            st = DuplicateState(root, permanent_delete=False)
+            st.build_index()
+            cache = json.loads(st.cache_path.read_text())
+            cache["A.jpg"] = 5
+            cache["B.jpg"][2:] = ["x", "y"]
+            cache["C.jpg"][2:] = [1.5, 2]
+            cache["C (2).jpg"][2:] = [-1, 2]
+            st.cache_path.write_text(json.dumps(cache))
+
+            st.build_index()
+            page = st.pairs_page(cursor=0, limit=10)
+            self.assertEqual(page["total_candidate_pairs"], 3)
+            for pair in page["pairs"]:
+                self.assertIsNone(pair["left"]["width"])
+                self.assertIsNone(pair["right"]["width"])
+
+    def test_iter_pairs_matches_pairs_page(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            for name in ("A.jpg", "A (2).jpg", "B.jpg", "B (2).jpg", "C.jpg", "C (2).jpg"):
+                self._write(root / name)
+            st = DuplicateState(root, permanent_delete=False)
+            st.build_index()
+
+            *records, trailer = st.iter_pairs(cursor=0, limit=2)
+            page = st.pairs_page(cursor=0, limit=2)
+            self.assertEqual(records, page["pairs"])
+            self.assertEqual(trailer, {k: v for k, v in page.items() if k != "pairs"})
+            self.assertFalse(trailer["done"])
+
+    def test_iter_pairs_releases_lock_between_items(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            for name in ("A.jpg", "A (2).jpg", "B.jpg", "B (2).jpg"):
+                self._write(root / name)
+            st = DuplicateState(root, permanent_delete=False)
+            st.build_index()
+
+            items = 0
+            for _ in st.iter_pairs(cursor=0, limit=10):
+                # The consumer (e.g. a socket write) runs without the state lock.
+                self.assertFalse(st._lock.locked())
+                items += 1
+            self.assertEqual(items, 3)  # two pairs + trailer
+
+    def test_relative_root_with_subfolder(self):
+        with tempfile.TemporaryDirectory() as td:
+            self._write(Path(td) / "2024" / "A.jpg")
+            self._write(Path(td) / "2024" / "A (2).jpg")
+            cwd = os.getcwd()
+            os.chdir(td)
+            try:
+                st = DuplicateState(Path("."), permanent_delete=False, subfolder="2024")
+                st.build_index()
+                pair = st.pairs_page(cursor=0, limit=10)["pairs"][0]
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(pair["left"]["relpath"], os.path.join("2024", "A.jpg"))
+            self.assertEqual(pair["right"]["relpath"], os.path.join("2024", "A (2).jpg"))
 
     def test_hidden_dirs_ignored(self):
         with tempfile.TemporaryDirectory() as td:
@@ -67,6 +160,16 @@ class DuplicateStateTests(unittest.TestCase):
             page = st.pairs_page(cursor=0, limit=10)
             self.assertEqual(page["pairs"], [])
 
+    def test_symlinked_files_ignored(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            self._write(root / "A.jpg")
+            (root / "A (2).jpg").symlink_to(root / "A.jpg")
+            st = DuplicateState(root, permanent_delete=False)
+            st.build_index()
+            page = st.pairs_page(cursor=0, limit=10)
+            self.assertEqual(page["pairs"], [])
+
     def test_pairs_do_not_cross_folders(self):
         with tempfile.TemporaryDirectory() as td:
             root = Path(td)
@@ -90,6 +193,174 @@ class DuplicateStateTests(unittest.TestCase):
                 right_dir = Path(pair["right"]["relpath"]).parent.as_posix()
                 self.assertEqual(left_dir, right_dir)
 
+    def test_dimension_cache_reused_when_unchanged(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            self._write(root / "A.jpg")
+            self._write(root / "A (2).jpg")
+            self._write(root / "B.jpg")
+
+            st = DuplicateState(root, permanent_delete=False)
+            st.build_index()
+            cache = json.loads(st.cache_path.read_text())
+            # Files without a duplicate candidate are never probed.
+            self.assertEqual(set(cache), {"A.jpg", "A (2).jpg"})
+
+            # A matching (mtime, size) entry is trusted instead of re-parsing.
+            for entry in cache.values():
+                entry[2:] = [640, 480]
+            st.cache_path.write_text(json.dumps(cache))
+            st.build_index()
+            info = st.pairs_page(cursor=0, limit=10)["pairs"][0]["left"]
+            self.assertEqual((info["width"], info["height"]), (640, 480))
+
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key("2E1B4361 (2).JPG"), "2e1b4361")
+        self.assertEqual(normalize_key("a (1) (12).jpg"), "a (1)")
+        for name in ("a(2).jpg", "a (x).jpg", "a ().jpg", "a (2)b.jpg"):
+            self.assertEqual(normalize_key(name), name.rpartition(".")[0].lower(), name)
+
+    def test_filter_aspect_matches(self):
+        widths = array("q", [4000, 2000, 3000, -1, 4001])
+        heights = array("q", [3000, 1500, 3000, -1, 3000])
+        ids = [0, 1, 2, 3, 4]
+        # Same ratio and within 0.1% match; square and unknown do not.
+        self.assertEqual(filter_aspect_matches(ids, widths, heights, 0), [1, 4])
+        # Unknown base dimensions pair with everything.
+        self.assertEqual(filter_aspect_matches(ids, widths, heights, 3), [0, 1, 2, 4])
+
+
+class ImageDimensionTests(unittest.TestCase):
+    def _dims(self, content: bytes):
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "img"
+            p.write_bytes(content)
+            return get_image_dimensions(p)
+
+    def test_png(self):
+        png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", 640, 480) + b"\x00" * 8
+        self.assertEqual(self._dims(png), (640, 480))
+
+    def test_bmp_top_down(self):
+        bmp = b"BM" + b"\x00" * 16 + struct.pack("<ii", 800, -600) + b"\x00" * 28
+        self.assertEqual(self._dims(bmp), (800, 600))
+
+    def test_webp_extended(self):
+        webp = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8
+        webp += (6000 - 1).to_bytes(3, "little") + (4000 - 1).to_bytes(3, "little") + b"\x00" * 4
+        self.assertEqual(self._dims(webp), (6000, 4000))
+
+    def test_tiff_short_and_long_tags(self):
+        for order, bom in (("<", b"II"), (">", b"MM")):
+            ifd = struct.pack(order + "H", 3)
+            ifd += struct.pack(order + "HHII", 254, 4, 1, 0)
+            ifd += struct.pack(order + "HHIHH", 256, 3, 1, 5472, 0)  # SHORT
+            ifd += struct.pack(order + "HHII", 257, 4, 1, 3648)  # LONG
+            tiff = bom + struct.pack(order + "HI", 42, 8) + ifd + b"\x00" * 4
+            self.assertEqual(self._dims(tiff), (5472, 3648), bom)
+
+    def test_jpeg(self):
+        self.assertEqual(self._dims(_jpeg(4000, 3000)), (4000, 3000))
+
+    def test_jpeg_sof_beyond_first_read(self):
+        # Large APP segments (e.g. EXIF thumbnails) push the SOF marker past
+        # the initial buffered read.
+        self.assertEqual(self._dims(_jpeg(1920, 1080, app_segments=3)), (1920, 1080))
+
+
+class RangeHeaderTests(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(_parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(_parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(_parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(_parse_range("bytes=50-500", 100), (50, 99))
+        # Start past EOF is returned so the handler can reply 416.
+        self.assertEqual(_parse_range("bytes=200-", 100)[0], 200)
+        for bad in (None, "bytes=5-1", "bytes=0-1,4-5", "items=0-1", "bytes=x-"):
+            self.assertIsNone(_parse_range(bad, 100), bad)
+
+
+class ImageEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        root = Path(self._td.name)
+        self.body = bytes(range(100))
+        (root / "A.jpg").write_bytes(self.body)
+        (root / "A (2).jpg").write_bytes(self.body)
+        (root / "Z.jpg").write_bytes(b"")
+        (root / "Z (2).jpg").write_bytes(b"")
+        state = DuplicateState(root, permanent_delete=False)
+        state.build_index()
+        ids = {p["left"]["name"]: p["left"]["id"] for p in state.pairs_page(cursor=0, limit=10)["pairs"]}
+        self.fid, self.empty_fid = ids["A.jpg"], ids["Z.jpg"]
+
+        handler_cls = type("QuietHandler", (Handler,), {"state": state, "log_message": lambda *a: None})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._td.cleanup()
+
+    def _get(self, fid: int, **headers):
+        conn = http.client.HTTPConnection(*self.httpd.server_address)
+        try:
+            conn.request("GET", f"/img/{fid}", headers=headers)
+            resp = conn.getresponse()
+            return resp.status, resp.headers, resp.read()
+        finally:
+            conn.close()
+
+    def test_full_then_not_modified(self):
+        status, headers, body = self._get(self.fid)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.body)
+        self.assertEqual(headers["Accept-Ranges"], "bytes")
+
+        status, headers2, body = self._get(self.fid, **{"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(headers2["ETag"], headers["ETag"])
+
+        status, _, _ = self._get(self.fid, **{"If-None-Match": '"stale"'})
+        self.assertEqual(status, 200)
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        status, _, body = self._get(self.fid, **{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.body)
+
+    def test_range(self):
+        status, headers, body = self._get(self.fid, Range="bytes=10-19")
+        self.assertEqual(status, 206)
+        self.assertEqual(headers["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(body, self.body[10:20])
+
+        status, headers, body = self._get(self.fid, Range="bytes=-5")
+        self.assertEqual(status, 206)
+        self.assertEqual(body, self.body[-5:])
+
+        status, headers, _ = self._get(self.fid, Range="bytes=100-")
+        self.assertEqual(status, 416)
+        self.assertEqual(headers["Content-Range"], "bytes */100")
+
+    def test_empty_file(self):
+        # Read the raw stream to make sure exactly one response is written.
+        with socket.create_connection(self.httpd.server_address) as sock:
+            sock.sendall(f"GET /img/{self.empty_fid} HTTP/1.0\r\n\r\n".encode())
+            raw = b""
+            while chunk := sock.recv(65536):
+                raw += chunk
+        self.assertTrue(raw.startswith(b"HTTP/1.0 200"))
+        self.assertEqual(raw.count(b"HTTP/1."), 1)
+        self.assertTrue(raw.endswith(b"\r\n\r\n"))
+
+    def test_unknown_id(self):
+        status, _, body = self._get(9999)
+        self.assertEqual(status, 404)
+        self.assertIn("error", json.loads(body))
+
 
 if __name__ == "__main__":
     unittest.main()